@@ -6,6 +6,30 @@ from scheduler import solve_sports_scheduling
 import numpy as np
 import random
 import os
+from functools import lru_cache
+
+# Prefer orjson's faster parser for test case files, falling back to the standard library
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+PLOT_OUTPUT_FILE = "scheduling_results.png"
+
+@lru_cache(maxsize=16)
+def _teams(n):
+    """Team numbers 1..n (cached; convert to a list before mutating)."""
+    return tuple(range(1, n + 1))
+
+@lru_cache(maxsize=16)
+def _events(n):
+    """Event names for n teams, one match for each pair of teams (cached)."""
+    return tuple(f"Match {i+1}" for i in range(n // 2))
+
+@lru_cache(maxsize=16)
+def _slots(n):
+    """Time slot names 'Slot 1'..'Slot n' (cached)."""
+    return tuple(f"Slot {i+1}" for i in range(n))
 
 def load_test_cases(file_path):
     """
@@ -13,7 +37,7 @@ def load_test_cases(file_path):
     """
     try:
         with open(file_path, 'r') as file:
-            return json.load(file)
+            return _json.loads(file.read())
     except FileNotFoundError:
         print(f"File {file_path} not found. Creating a default test cases file.")
         default_test_cases = [
@@ -41,7 +65,7 @@ def generate_random_test_case():
     num_teams = random.randint(4, 10)  # Between 4 and 10 teams
     
     # Randomly divide teams into strong, medium, and weak categories
-    teams = list(range(1, num_teams + 1))
+    teams = list(_teams(num_teams))
     random.shuffle(teams)
     
     # Determine the number of teams in each category
@@ -82,7 +106,7 @@ def get_user_input_test_case():
         except ValueError:
             print("Please enter a valid number.")
     
-    teams = list(range(1, num_teams + 1))
+    teams = list(_teams(num_teams))
     
     print(f"\nAvailable teams: {teams}")
     print("Assign teams to categories (strong, medium, weak).")
@@ -129,17 +153,17 @@ def solve_single_test_case(test_case):
     num_teams = test_case['num_teams']
     
     # Create the teams list and event list
-    teams = list(range(1, num_teams + 1))
-    events = [f"Match {i+1}" for i in range(num_teams // 2)]  # One match for each pair of teams
+    teams = _teams(num_teams)
+    events = _events(num_teams)  # One match for each pair of teams
     
     # Create time slots
-    time_slots = [f"Slot {i+1}" for i in range(num_teams)]
+    time_slots = _slots(num_teams)
     
     # Costs are assigned arbitrarily
     costs = {event: 100 for event in events}
     
     # Team availability (all teams available for all time slots)
-    team_availability = {f"Slot {i+1}": teams for i in range(len(time_slots))}
+    team_availability = {slot: teams for slot in time_slots}
     
     # Event duration (each event has a duration of 1)
     event_duration = {event: 1 for event in events}
@@ -155,20 +179,16 @@ def solve_single_test_case(test_case):
         event_duration=event_duration
     )
     
-    # Initialize tracking dictionaries
-    team_participation = {i: 0 for i in range(1, num_teams + 1)}
-    event_distribution = {event: 0 for event in events}
-    venue_utilization = {slot: 0 for slot in time_slots}
-    
-    # Update participation data
-    for (team, event, time_slot), scheduled in schedule.items():
-        if scheduled == 1:
-            team_participation[team] += 1
-            event_distribution[event] += 1
-            venue_utilization[time_slot] += 1
+    # Count participation per team, event and slot (indexed like teams, events and time_slots)
+    team_participation = np.bincount(schedule[:, 0], minlength=len(teams)).astype(np.int32)
+    event_distribution = np.bincount(schedule[:, 1], minlength=len(events)).astype(np.int32)
+    venue_utilization = np.bincount(schedule[:, 2], minlength=len(time_slots)).astype(np.int32)
     
     return {
         "test_case": test_case,
+        "teams": teams,
+        "events": events,
+        "time_slots": time_slots,
         "schedule": schedule,
         "objective": objective,
         "team_participation": team_participation,
@@ -176,37 +196,58 @@ def solve_single_test_case(test_case):
         "venue_utilization": venue_utilization
     }
 
+def get_distributions(result):
+    """
+    Converts a test case result's count arrays into dicts keyed by team, event and time slot.
+    """
+    return (
+        dict(zip(result["teams"], result["team_participation"].tolist())),
+        dict(zip(result["events"], result["event_distribution"].tolist())),
+        dict(zip(result["time_slots"], result["venue_utilization"].tolist()))
+    )
+
 def run_test_cases(test_cases):
     """
-    Runs multiple test cases and returns results.
+    Runs multiple test cases and returns results, the aggregated counts, and the
+    (teams, events, slots) keys with a nonzero count, in label order.
     """
     results = []
     
-    # Initialize tracking dictionaries for all test cases
+    # Initialize tracking arrays for all test cases
     max_team_num = max([tc['num_teams'] for tc in test_cases])
-    team_participation = {i: 0 for i in range(1, max_team_num + 1)}
+    team_participation = np.zeros(max_team_num, dtype=np.int32)
     
     max_events = max([tc['num_teams'] // 2 for tc in test_cases])
-    event_distribution = {f"Match {i+1}": 0 for i in range(max_events)}
+    event_distribution = np.zeros(max_events, dtype=np.int32)
     
     max_slots = max([tc['num_teams'] for tc in test_cases])
-    venue_utilization = {f"Slot {i+1}": 0 for i in range(max_slots)}
+    venue_utilization = np.zeros(max_slots, dtype=np.int32)
     
     for test_case in test_cases:
         result = solve_single_test_case(test_case)
         results.append(result)
         
-        # Aggregate participation data for overall plotting
-        for team, count in result["team_participation"].items():
-            team_participation[team] += count
-        
-        for event, count in result["event_distribution"].items():
-            event_distribution[event] += count
-        
-        for slot, count in result["venue_utilization"].items():
-            venue_utilization[slot] += count
+        # Aggregate participation data for overall plotting. Teams, events and
+        # slots are numbered from 1 in every test case, so each result's counts
+        # line up with the start of the aggregate arrays.
+        team_participation[:len(result["team_participation"])] += result["team_participation"]
+        event_distribution[:len(result["event_distribution"])] += result["event_distribution"]
+        venue_utilization[:len(result["venue_utilization"])] += result["venue_utilization"]
+    
+    # Record which keys were used while the counts are still arrays, so the
+    # plots do not have to filter the dicts again
+    nonzero_keys = (
+        [_teams(max_team_num)[i] for i in np.flatnonzero(team_participation)],
+        [_events(max_team_num)[i] for i in np.flatnonzero(event_distribution)],
+        [_slots(max_slots)[i] for i in np.flatnonzero(venue_utilization)]
+    )
+    
+    # Convert to dicts only once, for reporting and plotting
+    team_participation = dict(zip(_teams(max_team_num), team_participation.tolist()))
+    event_distribution = dict(zip(_events(max_team_num), event_distribution.tolist()))
+    venue_utilization = dict(zip(_slots(max_slots), venue_utilization.tolist()))
     
-    return results, team_participation, event_distribution, venue_utilization
+    return results, team_participation, event_distribution, venue_utilization, nonzero_keys
 
 def evaluate_test_case(result):
     """
@@ -214,9 +255,7 @@ def evaluate_test_case(result):
     """
     test_case = result["test_case"]
     objective = result["objective"]
-    team_participation = result["team_participation"]
-    event_distribution = result["event_distribution"]
-    venue_utilization = result["venue_utilization"]
+    team_participation, event_distribution, venue_utilization = get_distributions(result)
     
     num_teams = test_case['num_teams']
     strong_teams = test_case['strong']
@@ -228,14 +267,15 @@ def evaluate_test_case(result):
     
     # Objective evaluation
     print(f"Total Objective Value (Cost): {objective}")
-    if objective < 1000:
+    if objective is None:
+        print("No feasible schedule was found for this test case.")
+    elif objective < 1000:
         print("Objective value is relatively low, indicating a good scheduling solution.")
     else:
         print("Objective value is high, indicating room for improvement in the scheduling optimization.")
     
     # Team participation evaluation
-    max_participation = max(team_participation.values())
-    max_team = max(team_participation, key=team_participation.get)
+    max_team, max_participation = max(team_participation.items(), key=lambda kv: kv[1])
     print(f"Team Participation Distribution: {team_participation}")
     if max_participation <= 3:
         print("Team participation is well balanced, with no team overused.")
@@ -252,91 +292,82 @@ def evaluate_test_case(result):
     
     # Venue utilization evaluation
     print(f"Venue Utilization: {venue_utilization}")
-    max_utilization = max(venue_utilization.values())
-    max_slot = max(venue_utilization, key=venue_utilization.get)
+    max_slot, max_utilization = max(venue_utilization.items(), key=lambda kv: kv[1])
     if max_utilization <= 2:
         print("Venue utilization is optimal, with each time slot efficiently used.")
     else:
         print(f"Some slots are underutilized or overutilized. Slot {max_slot} had the highest utilization ({max_utilization}).")
 
-def plot_results(results, team_participation, event_distribution, venue_utilization):
+def draw_bar_chart(ax, labels, values, color, xlabel, ylabel, title):
+    """
+    Draws a bar chart at integer positions with the given tick labels.
+    """
+    positions = np.arange(len(labels))
+    ax.bar(positions, values, color=color)
+    ax.set_xticks(positions, labels=[str(label) for label in labels])
+    ax.set(xlabel=xlabel, ylabel=ylabel, title=title)
+
+def plot_results(results, team_participation, event_distribution, venue_utilization, nonzero_keys=None):
     """
-    Plots various metrics for evaluating the scheduling solution.
+    Plots various metrics for evaluating the scheduling solution on a single 2x2 figure.
+    Only teams, events and slots with a nonzero count are shown; pass nonzero_keys
+    (as returned by run_test_cases) to skip filtering the dicts here.
     """
+    if nonzero_keys is None:
+        nonzero_keys = tuple(
+            [key for key, count in counts.items() if count > 0]
+            for counts in (team_participation, event_distribution, venue_utilization)
+        )
+    active_teams, active_events, active_slots = nonzero_keys
+    
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    
     # Plot 1: Total cost (objective) vs. test cases
-    objectives = [result["objective"] for result in results]
+    objectives = np.fromiter((result["objective"] or 0 for result in results), dtype=float, count=len(results))
     test_case_labels = [f"Case {i+1}" for i in range(len(results))]
-    
-    plt.figure(figsize=(10, 6))
-    plt.bar(test_case_labels, objectives, color='skyblue')
-    plt.xlabel("Test Cases")
-    plt.ylabel("Objective Value (Total Cost)")
-    plt.title("Performance Evaluation of Sports Scheduling")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    plt.show()
-    
-    # Plot 2: Team participation distribution
-    # Filter to only include teams that participated
-    active_teams = {team: count for team, count in team_participation.items() if count > 0}
-    teams = list(active_teams.keys())
-    participations = list(active_teams.values())
-    
-    plt.figure(figsize=(10, 6))
-    plt.bar(teams, participations, color='lightgreen')
-    plt.xlabel("Team Number")
-    plt.ylabel("Number of Participations")
-    plt.title("Team Participation Distribution")
-    plt.tight_layout()
-    plt.show()
-    
-    # Plot 3: Event distribution across time slots
-    # Filter to only include events that occurred
-    active_events = {event: count for event, count in event_distribution.items() if count > 0}
-    events = list(active_events.keys())
-    event_counts = list(active_events.values())
-    
-    plt.figure(figsize=(10, 6))
-    plt.bar(events, event_counts, color='salmon')
-    plt.xlabel("Event")
-    plt.ylabel("Number of Occurrences")
-    plt.title("Event Distribution Across Time Slots")
-    plt.tight_layout()
-    plt.show()
-    
-    # Plot 4: Venue utilization across time slots
-    # Filter to only include slots that were used
-    active_slots = {slot: count for slot, count in venue_utilization.items() if count > 0}
-    slots = list(active_slots.keys())
-    slot_utilization = list(active_slots.values())
-    
-    plt.figure(figsize=(10, 6))
-    plt.bar(slots, slot_utilization, color='lightcoral')
-    plt.xlabel("Time Slot")
-    plt.ylabel("Number of Events Scheduled")
-    plt.title("Venue Utilization Across Time Slots")
-    plt.tight_layout()
-    plt.show()
+    draw_bar_chart(axes[0, 0], test_case_labels, objectives, 'skyblue',
+                   "Test Cases", "Objective Value (Total Cost)", "Performance Evaluation of Sports Scheduling")
+    
+    # Plot 2: Team participation distribution (teams that participated)
+    participations = np.fromiter((team_participation[team] for team in active_teams), dtype=int, count=len(active_teams))
+    draw_bar_chart(axes[0, 1], active_teams, participations, 'lightgreen',
+                   "Team Number", "Number of Participations", "Team Participation Distribution")
+    
+    # Plot 3: Event distribution across time slots (events that occurred)
+    event_counts = np.fromiter((event_distribution[event] for event in active_events), dtype=int, count=len(active_events))
+    draw_bar_chart(axes[1, 0], active_events, event_counts, 'salmon',
+                   "Event", "Number of Occurrences", "Event Distribution Across Time Slots")
+    
+    # Plot 4: Venue utilization across time slots (slots that were used)
+    slot_utilization = np.fromiter((venue_utilization[slot] for slot in active_slots), dtype=int, count=len(active_slots))
+    draw_bar_chart(axes[1, 1], active_slots, slot_utilization, 'lightcoral',
+                   "Time Slot", "Number of Events Scheduled", "Venue Utilization Across Time Slots")
+    
+    # Rotate the test case labels once all subplots are built, then lay out once
+    plt.setp(axes[0, 0].get_xticklabels(), rotation=45, ha="right")
+    fig.tight_layout()
+    
+    # Headless runs fall back to the non-interactive Agg backend, where show() is a no-op
+    if plt.get_backend().lower() == "agg":
+        fig.savefig(PLOT_OUTPUT_FILE)
+        print(f"Analysis graphs saved to {PLOT_OUTPUT_FILE}")
+    else:
+        plt.show()
+    plt.close(fig)
 
 def display_schedule(result):
     """
     Displays the schedule in a readable format.
     """
     schedule = result["schedule"]
-    
-    # Group by time slot
-    slot_schedule = {}
-    for (team, event, time_slot), scheduled in schedule.items():
-        if scheduled == 1:
-            if time_slot not in slot_schedule:
-                slot_schedule[time_slot] = []
-            slot_schedule[time_slot].append((team, event))
+    teams, events, time_slots = result["teams"], result["events"], result["time_slots"]
     
     print("\n=== Scheduled Events ===")
-    for slot in sorted(slot_schedule.keys()):
-        print(f"\n{slot}:")
-        for team, event in slot_schedule[slot]:
-            print(f"  Team {team} in {event}")
+    # Group by time slot, in slot order
+    for slot in np.unique(schedule[:, 2]):
+        print(f"\n{time_slots[slot]}:")
+        for team, event in schedule[schedule[:, 2] == slot, :2].tolist():
+            print(f"  Team {teams[team]} in {events[event]}")
 
 def main_menu():
     """
@@ -360,7 +391,7 @@ def main_menu():
             test_cases = generate_random_test_cases(num_cases)
             
             print(f"\nRunning {num_cases} random test cases...")
-            results, team_participation, event_distribution, venue_utilization = run_test_cases(test_cases)
+            results, team_participation, event_distribution, venue_utilization, nonzero_keys = run_test_cases(test_cases)
             
             for i, result in enumerate(results):
                 print(f"\n--- Test Case {i+1} ---")
@@ -368,7 +399,7 @@ def main_menu():
                 display_schedule(result)
             
             print("\nGenerating analysis graphs...")
-            plot_results(results, team_participation, event_distribution, venue_utilization)
+            plot_results(results, team_participation, event_distribution, venue_utilization, nonzero_keys)
             
         elif choice == '2':
             test_case = generate_random_test_case()
@@ -385,10 +416,7 @@ def main_menu():
             display_schedule(result)
             
             print("\nGenerating analysis graphs...")
-            plot_results([result], 
-                        result["team_participation"],
-                        result["event_distribution"], 
-                        result["venue_utilization"])
+            plot_results([result], *get_distributions(result))
             
         elif choice == '3':
             test_case = get_user_input_test_case()
@@ -400,10 +428,7 @@ def main_menu():
             display_schedule(result)
             
             print("\nGenerating analysis graphs...")
-            plot_results([result], 
-                        result["team_participation"],
-                        result["event_distribution"], 
-                        result["venue_utilization"])
+            plot_results([result], *get_distributions(result))
             
         elif choice == '4':
             print("\nExiting program. Thank you for using Sports Scheduling Optimizer!")
@@ -417,11 +442,4 @@ if __name__ == "__main__":
     print("Welcome to Sports Scheduling Optimizer!")
     print("This program helps you create and analyze sports schedules.")
     
-    # Check if scheduler module is available
-    try:
-        from scheduler import solve_sports_scheduling
-        main_menu()
-    except ImportError:
-        print("\nError: The 'scheduler' module could not be imported.")
-        print("Please ensure that 'scheduler.py' is in the same directory as this script.")
-        print("This module should contain the 'solve_sports_scheduling' function.")
\ No newline at end of file
+    main_menu()
@@ -1,62 +1,147 @@
 # scheduler.py
 
-from pulp import LpMaximize, LpProblem, LpVariable, lpSum, value
+import functools
+import itertools
 
-def solve_sports_scheduling(teams, events, time_slots, venue_capacity, costs, team_availability, event_duration):
+import numpy as np
+from ortools.sat.python import cp_model
+
+@functools.lru_cache(maxsize=32)
+def build_model(teams, events, time_slots, venue_capacity, avail_set):
     """
-    Solves the sports scheduling problem using linear programming.
+    Builds the CP-SAT model structure for one problem shape. The result is cached, so
+    repeated solves with the same teams, events, slots, capacity and availability only
+    need a new objective.
 
     Parameters:
-    - teams (list): List of teams participating in the event.
-    - events (list): List of sports events to schedule.
-    - time_slots (list): Available time slots.
+    - teams (tuple): Teams participating in the event.
+    - events (tuple): Sports events to schedule.
+    - time_slots (tuple): Available time slots.
     - venue_capacity (int): Maximum number of teams that can play in the venue.
-    - costs (list): List of costs for each team or event.
-    - team_availability (dict): Availability of teams for each time slot.
-    - event_duration (dict): Duration of each event.
+    - avail_set (frozenset): (time_slot, team) pairs in which the team is available.
 
     Returns:
-    - schedule (dict): The optimal schedule of events and teams.
-    - objective (float): The objective value (e.g., minimized cost, maximized matchups).
+    - model (cp_model.CpModel): The model with all constraints but no objective.
+    - variables (list): The created decision variables, in flat (team, event, slot) order.
+    - var_index (np.ndarray): (N, 3) int32 array of each variable's (team, event, slot) indices.
     """
-    
-    # Define the LP problem
-    model = LpProblem(name="sports-scheduling", sense=LpMaximize)
 
-    # Create decision variables: which team plays in which event at what time
-    schedule_vars = {
-        (team, event, time_slot): LpVariable(f"schedule_{team}_{event}_{time_slot}", cat="Binary")
-        for team in teams for event in events for time_slot in time_slots
-    }
+    # Define the CP-SAT model
+    model = cp_model.CpModel()
+
+    num_teams, num_events, num_slots = len(teams), len(events), len(time_slots)
+
+    # Look up availability once as a (teams, slots) mask rather than scanning
+    # the availability lists for every (team, event, slot) triple
+    available = np.array([[(time_slot, team) in avail_set for time_slot in time_slots] for team in teams], dtype=bool)
+    available_pairs = list(zip(*np.nonzero(available)))
 
-    # Ensure each team is assigned to one event per time slot
-    for team in teams:
-        for time_slot in time_slots:
-            model += lpSum(schedule_vars[(team, event, time_slot)] for event in events) == 1, f"team_{team}_time_slot_{time_slot}"
+    # Create decision variables: which team plays in which event at what time.
+    # Teams that are unavailable in a slot get no variable at all (constant 0),
+    # so the solver never sees them.
+    x = np.zeros((num_teams, num_events, num_slots), dtype=object)
+    for t, s in available_pairs:
+        for e in range(num_events):
+            x[t, e, s] = model.new_bool_var(f"schedule_{teams[t]}_{events[e]}_{time_slots[s]}")
+
+    # Ensure each available team is assigned to one event per time slot. The literal
+    # lists go straight to CP-SAT's native exactly-one constraint, so no linear
+    # expression objects are built in Python.
+    for t, s in available_pairs:
+        model.add_exactly_one(x[t, :, s].tolist())
 
     # Ensure each event happens at one time slot with enough teams
-    for event in events:
-        for time_slot in time_slots:
-            model += lpSum(schedule_vars[(team, event, time_slot)] for team in teams) <= venue_capacity, f"event_{event}_time_slot_{time_slot}"
+    for e, s in itertools.product(range(num_events), range(num_slots)):
+        event_vars = [var for var in x[:, e, s].tolist() if not isinstance(var, int)]
+        if len(event_vars) <= venue_capacity:
+            continue  # Cannot be exceeded
+        if venue_capacity == 1:
+            model.add_at_most_one(event_vars)
+        else:
+            model.add(cp_model.LinearExpr.sum(event_vars) <= venue_capacity)
+
+    # Record the created variables in flat index order together with their
+    # (team, event, slot) indices, so a solve only gathers costs and results
+    idx = np.arange(num_teams * num_events * num_slots).reshape(num_teams, num_events, num_slots)
+    created = idx[np.broadcast_to(available[:, None, :], idx.shape)]
+    variables = x.ravel()[created].tolist()
+    var_index = np.stack(np.unravel_index(created, idx.shape), axis=1).astype(np.int32)
+
+    return model, variables, var_index
+
+def solve(model, variables, var_index, cost_vector, solver=None):
+    """
+    Sets the objective on a (possibly cached) model and solves it.
 
-    # Constraints for team availability
-    for team in teams:
-        for time_slot in time_slots:
-            if team not in team_availability[time_slot]:
-                for event in events:
-                    model += schedule_vars[(team, event, time_slot)] == 0, f"team_{team}_not_available_{time_slot}"
+    Parameters:
+    - model, variables, var_index: As returned by build_model.
+    - cost_vector (list): Cost of each event, in the order of the model's events.
+    - solver (cp_model.CpSolver, optional): Pre-configured solver. Defaults to a quiet
+      CP-SAT solver with a 30 second time limit.
 
-    # Objective: Minimize cost or maximize the number of matches played
-    model += lpSum(costs[event] * schedule_vars[(team, event, time_slot)] for team in teams for event in events for time_slot in time_slots), "Total_Cost"
+    Returns:
+    - schedule (np.ndarray): (K, 3) int32 array of scheduled (team, event, slot) indices.
+    - objective (float): The objective value, or None if no feasible schedule exists.
+    """
+
+    # Objective: Minimize the total cost of the scheduled events (one gather of the event costs)
+    model.clear_objective()
+    model.minimize(cp_model.LinearExpr.weighted_sum(variables, np.asarray(cost_vector)[var_index[:, 1]].tolist()))
 
     # Solve the problem
-    model.solve()
+    if solver is None:
+        solver = cp_model.CpSolver()
+        solver.parameters.log_search_progress = False
+        solver.parameters.max_time_in_seconds = 30.0
+    status = solver.solve(model)
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return np.empty((0, 3), dtype=np.int32), None
 
-    # Prepare result
-    schedule = {
-        (team, event, time_slot): schedule_vars[(team, event, time_slot)].value()
-        for team in teams for event in events for time_slot in time_slots if schedule_vars[(team, event, time_slot)].value() == 1
-    }
-    objective = value(model.objective)
+    # Prepare result, reading each variable's value exactly once
+    scheduled = np.fromiter((solver.boolean_value(var) for var in variables), dtype=bool, count=len(variables))
+    schedule = var_index[scheduled]
+    objective = solver.objective_value
 
     return schedule, objective
+
+def solve_sports_scheduling(teams, events, time_slots, venue_capacity, costs, team_availability, event_duration, solver=None):
+    """
+    Solves the sports scheduling problem using constraint programming (OR-Tools CP-SAT).
+
+    Parameters:
+    - teams (list): List of teams participating in the event.
+    - events (list): List of sports events to schedule.
+    - time_slots (list): Available time slots.
+    - venue_capacity (int): Maximum number of teams that can play in the venue.
+    - costs (list): List of costs for each team or event.
+    - team_availability (dict): Availability of teams for each time slot.
+    - event_duration (dict): Duration of each event.
+    - solver (cp_model.CpSolver, optional): Pre-configured solver. Defaults to a quiet
+      CP-SAT solver with a 30 second time limit.
+
+    Returns:
+    - schedule (np.ndarray): (K, 3) int32 array of scheduled (team, event, time_slot) index
+      triples into teams, events and time_slots.
+    - objective (float): The objective value (e.g., minimized cost, maximized matchups).
+    """
+
+    avail_set = frozenset(
+        (time_slot, team) for time_slot, slot_teams in team_availability.items() for team in slot_teams
+    )
+
+    # With equal event costs and every team available in every slot, any feasible
+    # assignment costs the same, so deal teams out to events round-robin (at most
+    # ceil(teams / events) per event) without calling the solver
+    event_costs = {costs[event] for event in events}
+    all_available = all((time_slot, team) in avail_set for time_slot in time_slots for team in teams)
+    if events and len(event_costs) == 1 and all_available and venue_capacity * len(events) >= len(teams):
+        team_idx = np.tile(np.arange(len(teams), dtype=np.int32), len(time_slots))
+        slot_idx = np.repeat(np.arange(len(time_slots), dtype=np.int32), len(teams))
+        schedule = np.stack([team_idx, team_idx % len(events), slot_idx], axis=1)
+        objective = float(event_costs.pop() * len(teams) * len(time_slots))
+        return schedule, objective
+
+    model, variables, var_index = build_model(tuple(teams), tuple(events), tuple(time_slots), venue_capacity, avail_set)
+
+    return solve(model, variables, var_index, [costs[event] for event in events], solver=solver)
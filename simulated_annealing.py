@@ -1,12 +1,278 @@
 import numpy as np
 import random
 import math
-import copy
+from numba import njit, prange
+
+# Numeric kernels for the annealing loop. They work on the (num_teams, num_rounds)
+# opponent/home matrices, the int8 strength codes and the flattened 27-entry cost
+# table kept by SportsScheduler, and are compiled with Numba (cached on disk).
+# The loop also keeps opp_s, the strength code of every team's opponent in every
+# round, and only refreshes it in the round columns a move touches.
+
+# Random numbers come from a 64-bit xorshift generator whose state lives in a
+# one-element uint64 array, so the helpers can advance it in place
+_SPLITMIX_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_SPLITMIX_MUL1 = np.uint64(0xBF58476D1CE4E5B9)
+_SPLITMIX_MUL2 = np.uint64(0x94D049BB133111EB)
+
+@njit(cache=True)
+def _seed_rng(seed):
+    """Create the generator state for a seed, scrambled with splitmix64 (xorshift state must be nonzero)."""
+    z = np.uint64(seed) + _SPLITMIX_GAMMA
+    z = (z ^ (z >> np.uint64(30))) * _SPLITMIX_MUL1
+    z = (z ^ (z >> np.uint64(27))) * _SPLITMIX_MUL2
+    state = np.empty(1, dtype=np.uint64)
+    state[0] = z ^ (z >> np.uint64(31))
+    if state[0] == 0:
+        state[0] = _SPLITMIX_GAMMA
+    return state
+
+@njit(cache=True)
+def _next_rand(state):
+    """Advance the xorshift generator and return the next 64-bit value."""
+    x = state[0]
+    x ^= x << np.uint64(13)
+    x ^= x >> np.uint64(7)
+    x ^= x << np.uint64(17)
+    state[0] = x
+    return x
+
+@njit(cache=True)
+def _rand_below(state, n):
+    """Uniform integer in [0, n), by Lemire's multiply-shift on the top 32 bits (no modulo)."""
+    return np.int64(((_next_rand(state) >> np.uint64(32)) * np.uint64(n)) >> np.uint64(32))
+
+@njit(cache=True)
+def _rand_unit(state):
+    """Uniform float in [0, 1) from the top 53 bits."""
+    return np.float64(_next_rand(state) >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+@njit(cache=True)
+def _local_cost(opp_s, strength_idx, cost_flat, team, r):
+    """Cost of a team's opponent pattern across the boundary between rounds r and r+1."""
+    if r < 0 or r + 1 >= opp_s.shape[1]:
+        return 0
+    return cost_flat[strength_idx[team] * 9 + opp_s[team, r] * 3 + opp_s[team, r + 1]]
+
+@njit(cache=True)
+def _opponent_strengths(opponent, opponent_strength_idx):
+    """Strength code of each team's opponent in every round (weak for a bye)."""
+    opp_s = np.empty(opponent.shape, dtype=opponent_strength_idx.dtype)
+    for t in range(opponent.shape[0]):
+        for r in range(opponent.shape[1]):
+            opp_s[t, r] = opponent_strength_idx[opponent[t, r]]
+    return opp_s
+
+@njit(cache=True)
+def _random_playing_team(opponent, r, rng_state):
+    """Pick a random team that has a match (no bye) in round r."""
+    # A round has at most one bye, so redrawing rarely takes more than one try
+    num_teams = opponent.shape[0]
+    t = _rand_below(rng_state, num_teams)
+    while opponent[t, r] < 0:
+        t = _rand_below(rng_state, num_teams)
+    return t
+
+@njit(cache=True)
+def _apply_neighbor(opponent, home, opp_s, strength_idx, cost_flat, saved_opponent, saved_home,
+                    in_move, involved, rng_state):
+    """
+    Move to a neighbor solution in place by a partial round swap or a home/away flip.
+    opp_s is kept in step with opponent. The touched round columns are first saved
+    into saved_opponent/saved_home (shape (num_teams, 2)) so the move can be undone
+    with _restore_columns. in_move (all False) and involved are per-team scratch
+    buffers; in_move is left all False again.
+    Returns the two touched rounds (-1 if unused) and the change in cost.
+    """
+    num_rounds = opponent.shape[1]
+    
+    # Try different neighborhood operations, picking one with a single bit of a draw
+    if (_next_rand(rng_state) & np.uint64(1)) == 0:
+        # Partial round swap: select two different rounds and a team
+        round1_idx = _rand_below(rng_state, num_rounds)
+        round2_idx = _rand_below(rng_state, num_rounds)
+        while round1_idx == round2_idx:
+            round2_idx = _rand_below(rng_state, num_rounds)
+        a = _random_playing_team(opponent, round1_idx, rng_state)
+        
+        # Chase the team's opponents in both rounds until the set of teams is
+        # closed. Every match these teams play in the two rounds is then among
+        # themselves, so exchanging the two rounds for just these teams always
+        # leaves a valid round robin and no retries are needed.
+        in_move[a] = True
+        involved[0] = a
+        num_involved = 1
+        k = 0
+        while k < num_involved:
+            t = involved[k]
+            k += 1
+            for r in (round1_idx, round2_idx):
+                o = opponent[t, r]
+                if o >= 0 and not in_move[o]:
+                    in_move[o] = True
+                    involved[num_involved] = o
+                    num_involved += 1
+        
+        saved_opponent[:, 0] = opponent[:, round1_idx]
+        saved_opponent[:, 1] = opponent[:, round2_idx]
+        saved_home[:, 0] = home[:, round1_idx]
+        saved_home[:, 1] = home[:, round2_idx]
+        
+        # Only the involved teams' costs across the boundaries on either side of
+        # the two rounds can change, so take those before and after the swap. When
+        # the rounds are adjacent the boundary between them is shared; the copy is
+        # replaced by -1, for which _local_cost is 0.
+        low, high = min(round1_idx, round2_idx), max(round1_idx, round2_idx)
+        boundaries = (low - 1, low, high - 1 if high - 1 > low else -1, high)
+        delta = 0
+        for k in range(num_involved):
+            t = involved[k]
+            for r in boundaries:
+                delta -= _local_cost(opp_s, strength_idx, cost_flat, t, r)
+            opponent[t, round1_idx], opponent[t, round2_idx] = opponent[t, round2_idx], opponent[t, round1_idx]
+            home[t, round1_idx], home[t, round2_idx] = home[t, round2_idx], home[t, round1_idx]
+            opp_s[t, round1_idx], opp_s[t, round2_idx] = opp_s[t, round2_idx], opp_s[t, round1_idx]
+            for r in boundaries:
+                delta += _local_cost(opp_s, strength_idx, cost_flat, t, r)
+        in_move[involved[:num_involved]] = False
+        return round1_idx, round2_idx, delta
+    
+    # Swap home/away status within the same match
+    round_idx = _rand_below(rng_state, num_rounds)
+    a = _random_playing_team(opponent, round_idx, rng_state)
+    b = opponent[a, round_idx]
+    
+    saved_opponent[:, 0] = opponent[:, round_idx]
+    saved_home[:, 0] = home[:, round_idx]
+    home[a, round_idx] = not home[a, round_idx]
+    home[b, round_idx] = not home[b, round_idx]
+    
+    # Home/away does not affect the cost
+    return round_idx, -1, 0
+
+@njit(cache=True)
+def _restore_columns(opponent, home, opp_s, opponent_strength_idx, saved_opponent, saved_home,
+                     round1_idx, round2_idx):
+    """Undo a move made by _apply_neighbor from its saved columns."""
+    for k, r in enumerate((round1_idx, round2_idx)):
+        if r < 0:
+            continue
+        opponent[:, r] = saved_opponent[:, k]
+        home[:, r] = saved_home[:, k]
+        for t in range(opponent.shape[0]):
+            opp_s[t, r] = opponent_strength_idx[opponent[t, r]]
+
+@njit(cache=True, nogil=True)
+def _sa_loop(opponent, home, strength_idx, opponent_strength_idx, cost_flat,
+             initial_cost, iterations, initial_temp, cooling_rate, seed, report_every):
+    """
+    Run the annealing loop; returns the best opponent/home matrices, their cost and
+    the best cost after every report_every iterations.
+    """
+    rng_state = _seed_rng(seed)
+    num_teams, num_rounds = opponent.shape
+    
+    # The current solution is mutated in place; rejected moves are rolled back
+    # from the two saved columns
+    current_opponent, current_home = opponent.copy(), home.copy()
+    current_opp_s = _opponent_strengths(current_opponent, opponent_strength_idx)
+    current_cost = initial_cost
+    saved_opponent = np.empty((num_teams, 2), dtype=opponent.dtype)
+    saved_home = np.empty((num_teams, 2), dtype=home.dtype)
+    in_move = np.zeros(num_teams, dtype=np.bool_)
+    involved = np.empty(num_teams, dtype=np.int64)
+    
+    # The best solution is only refreshed in the columns that changed since it was taken
+    best_opponent, best_home = opponent.copy(), home.copy()
+    best_cost = initial_cost
+    dirty = np.zeros(num_rounds, dtype=np.bool_)
+    
+    # Progress is recorded rather than printed, so the loop never needs the GIL
+    history = np.empty(iterations // report_every, dtype=np.int64)
+    
+    temp = initial_temp
+    
+    for i in range(iterations):
+        # Move to a neighbor solution. Both move types preserve a valid round robin,
+        # so the schedule is only validated before and after the loop.
+        round1_idx, round2_idx, delta = _apply_neighbor(
+            current_opponent, current_home, current_opp_s, strength_idx, cost_flat,
+            saved_opponent, saved_home, in_move, involved, rng_state
+        )
+        
+        neighbor_cost = current_cost + delta
+        
+        # Decide whether to accept the neighbor
+        if neighbor_cost < current_cost:
+            accept = True
+        else:
+            # Accept worse solution with probability exp(-delta / temp), tested in log
+            # space as log(u) * temp < -delta: no exp and no division by a temperature
+            # that may have cooled to 0 (u is drawn from (0, 1] so log(u) is finite).
+            # Costs are integers; this is the only floating point step.
+            log_u = math.log(1.0 - _rand_unit(rng_state))
+            accept = log_u * temp < -float(delta)
+        
+        if accept:
+            current_cost = neighbor_cost
+            if round1_idx >= 0:
+                dirty[round1_idx] = True
+            if round2_idx >= 0:
+                dirty[round2_idx] = True
+            
+            # Update best solution if needed
+            if current_cost < best_cost:
+                for r in range(num_rounds):
+                    if dirty[r]:
+                        best_opponent[:, r] = current_opponent[:, r]
+                        best_home[:, r] = current_home[:, r]
+                        dirty[r] = False
+                best_cost = current_cost
+        else:
+            _restore_columns(current_opponent, current_home, current_opp_s, opponent_strength_idx,
+                             saved_opponent, saved_home, round1_idx, round2_idx)
+        
+        # Cool down the temperature
+        temp *= cooling_rate
+        
+        # Record progress periodically
+        if (i + 1) % report_every == 0:
+            history[(i + 1) // report_every - 1] = best_cost
+    
+    return best_opponent, best_home, best_cost, history
+
+@njit(cache=True, nogil=True, parallel=True)
+def _sa_restarts(opponent, home, strength_idx, opponent_strength_idx, cost_flat,
+                 initial_cost, iterations, initial_temp, cooling_rate, base_seed, report_every, num_restarts):
+    """
+    Run independent annealing loops in parallel; returns the best matrices, cost and
+    cost history across them.
+    """
+    num_teams, num_rounds = opponent.shape
+    best_opponents = np.empty((num_restarts, num_teams, num_rounds), dtype=opponent.dtype)
+    best_homes = np.empty((num_restarts, num_teams, num_rounds), dtype=home.dtype)
+    best_costs = np.empty(num_restarts, dtype=np.int64)
+    histories = np.empty((num_restarts, iterations // report_every), dtype=np.int64)
+    
+    # Every worker starts from the same schedule with its own seed and its own copies
+    for w in prange(num_restarts):
+        worker_opponent, worker_home, worker_cost, worker_history = _sa_loop(
+            opponent, home, strength_idx, opponent_strength_idx, cost_flat,
+            initial_cost, iterations, initial_temp, cooling_rate, base_seed + w, report_every
+        )
+        best_opponents[w] = worker_opponent
+        best_homes[w] = worker_home
+        best_costs[w] = worker_cost
+        histories[w] = worker_history
+    
+    w = np.argmin(best_costs)
+    return best_opponents[w].copy(), best_homes[w].copy(), best_costs[w], histories[w].copy()
 
 class SportsScheduler:
     def __init__(self, num_teams=18, teams_strength=None, costs=None):
         self.num_teams = num_teams
-        self.num_rounds = num_teams - 1
+        # An odd number of teams is padded with a dummy team, giving one bye per round
+        self.num_rounds = num_teams - 1 if num_teams % 2 == 0 else num_teams
         
         # Define team strengths if not provided
         if teams_strength is None:
@@ -27,11 +293,39 @@ class SportsScheduler:
         else:
             self.costs = costs
         
-        # Initialize the schedule
-        self.schedule = self.initialize_schedule()
+        # Encode strengths as indices and precompute the cost of every (team, current
+        # opponent, next opponent) strength pattern. Costs only apply when both
+        # consecutive opponents are strong or medium; all other entries stay 0.
+        # Costs are integers, so schedule costs and deltas stay exact integers too.
+        strength_codes = {'S': 0, 'M': 1, 'W': 2}
+        self.strength_idx = np.array([strength_codes[s] for s in self.teams_strength], dtype=np.int8)
+        self.cost_tensor = np.zeros((3, 3, 3), dtype=np.int32)
+        for strength, code in strength_codes.items():
+            ss, sm, ms, mm = self.costs[strength]
+            self.cost_tensor[code, 0, 0] = ss  # Strong then strong
+            self.cost_tensor[code, 0, 1] = sm  # Strong then medium
+            self.cost_tensor[code, 1, 0] = ms  # Medium then strong
+            self.cost_tensor[code, 1, 1] = mm  # Medium then medium
+        
+        # Strength of each possible opponent. The trailing entry is what a bye (-1)
+        # indexes; it is encoded as weak so a bye never adds cost.
+        self.opponent_strength_idx = np.append(self.strength_idx[:num_teams], strength_codes['W'])
+        
+        # Flatten the tensor so each pattern is a single lookup at
+        # team * 9 + current opponent * 3 + next opponent, with the team part precomputed
+        self.cost_flat = self.cost_tensor.reshape(27)
+        self.key_stride = (self.strength_idx[:num_teams].astype(np.int32) * 9)[:, None]
+        
+        # Initialize the schedule as (num_teams, num_rounds) matrices:
+        # opponent[t, r] is team t's opponent in round r (-1 for a bye) and
+        # home[t, r] is True when team t plays at home in round r
+        self.opponent, self.home = self.initialize_schedule()
+        
+        # Best cost after every report_every iterations of the last annealing run
+        self.cost_history = np.empty(0, dtype=np.int64)
         
     def initialize_schedule(self):
-        """Create an initial valid round-robin tournament schedule."""
+        """Create an initial valid round-robin tournament schedule as opponent/home matrices."""
         # Fixed implementation to ensure correct schedule generation
         n = self.num_teams
         is_odd = n % 2 == 1
@@ -39,102 +333,59 @@ class SportsScheduler:
         if is_odd:
             n += 1  # Add a dummy team if odd
             
-        # Initialize teams
-        teams = list(range(n))
+        # Initialize teams, using the smallest signed type that holds every team id
+        # and the -1 bye (int8 up to 128 teams)
+        team_dtype = np.min_scalar_type(-n)
+        teams = np.arange(n, dtype=team_dtype)
+        half = n // 2
         
-        # Generate rounds
-        schedule = []
+        # Generate rounds directly into the matrices with the circle method: in every
+        # round the first half of the rotation plays the second half in reverse
+        opponent = np.empty((n, n - 1), dtype=team_dtype)
+        home = np.zeros((n, n - 1), dtype=bool)
         for round_num in range(n - 1):
-            round_matches = []
-            for i in range(n // 2):
-                home_team = teams[i]
-                away_team = teams[n - 1 - i]
-                
-                # Skip matches involving dummy team (if added)
-                if home_team < self.num_teams and away_team < self.num_teams:
-                    round_matches.append((home_team, away_team))
-            
-            schedule.append(round_matches)
+            home_teams, away_teams = teams[:half], teams[:half - 1:-1]
+            opponent[home_teams, round_num] = away_teams
+            opponent[away_teams, round_num] = home_teams
+            home[home_teams, round_num] = True
             
             # Rotate teams: keep first team fixed, rotate the rest
-            teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+            teams[1:] = np.roll(teams[1:], 1)
+        
+        # Drop the dummy team (if added); a match against it is a bye (-1)
+        opponent, home = opponent[:self.num_teams], home[:self.num_teams]
+        bye = opponent >= self.num_teams
+        opponent[bye] = -1
+        home[bye] = False
         
         # Print initial schedule to debug
         print("Initial schedule created:")
-        for r, round_matches in enumerate(schedule):
+        for r, round_matches in enumerate(self._to_tuple_schedule(opponent, home)):
             print(f"Round {r+1}: {round_matches}")
         
-        return schedule
+        return opponent, home
     
-    def get_opponent(self, team, round_matches):
-        """Find the opponent of a team in a round."""
-        for match in round_matches:
-            if team in match:
-                return match[0] if match[1] == team else match[1]
-        return None  # Team doesn't play in this round
-        
-    def evaluate_cost(self, schedule):
-        """Calculate the cost of the schedule."""
-        total_cost = 0
-        
-        # For each team
-        for team in range(self.num_teams):
-            team_strength = self.teams_strength[team]
-            
-            # Check consecutive rounds
-            for r in range(len(schedule) - 1):
-                # Find opponent in current round
-                current_opponent = self.get_opponent(team, schedule[r])
-                
-                # Find opponent in next round
-                next_opponent = self.get_opponent(team, schedule[r + 1])
-                
-                # Skip if team doesn't play in either round (shouldn't happen in valid schedule)
-                if current_opponent is None or next_opponent is None:
-                    continue
-                
-                # Get strengths of opponents
-                current_opp_strength = self.teams_strength[current_opponent]
-                next_opp_strength = self.teams_strength[next_opponent]
-                
-                # Apply costs based on consecutive opponent patterns
-                if current_opp_strength == 'S' and next_opp_strength == 'S':
-                    # Strong vs Strong then Strong
-                    if team_strength == 'S':
-                        total_cost += self.costs['S'][0]
-                    elif team_strength == 'M':
-                        total_cost += self.costs['M'][0]
-                    else:  # Weak team
-                        total_cost += self.costs['W'][0]
-                        
-                elif current_opp_strength == 'S' and next_opp_strength == 'M':
-                    # Strong vs Strong then Medium
-                    if team_strength == 'S':
-                        total_cost += self.costs['S'][1]
-                    elif team_strength == 'M':
-                        total_cost += self.costs['M'][1]
-                    else:  # Weak team
-                        total_cost += self.costs['W'][1]
-                        
-                elif current_opp_strength == 'M' and next_opp_strength == 'S':
-                    # Strong vs Medium then Strong
-                    if team_strength == 'S':
-                        total_cost += self.costs['S'][2]
-                    elif team_strength == 'M':
-                        total_cost += self.costs['M'][2]
-                    else:  # Weak team
-                        total_cost += self.costs['W'][2]
-                        
-                elif current_opp_strength == 'M' and next_opp_strength == 'M':
-                    # Strong vs Medium then Medium
-                    if team_strength == 'S':
-                        total_cost += self.costs['S'][3]
-                    elif team_strength == 'M':
-                        total_cost += self.costs['M'][3]
-                    else:  # Weak team
-                        total_cost += self.costs['W'][3]
-                
-        return total_cost
+    def _to_tuple_schedule(self, opponent=None, home=None):
+        """Convert opponent/home matrices to a list of rounds of (home, away) tuples."""
+        if opponent is None:
+            opponent, home = self.opponent, self.home
+        
+        num_teams, num_rounds = self.num_teams, opponent.shape[1]
+        schedule = []
+        for r in range(num_rounds):
+            schedule.append([
+                (team, int(opponent[team, r]))
+                for team in range(num_teams)
+                if opponent[team, r] >= 0 and home[team, r]
+            ])
+        return schedule
+        
+    def evaluate_cost(self, opponent):
+        """Calculate the cost of the schedule given its opponent matrix."""
+        # Strength of each team's opponent in every round, then one linear gather of
+        # the cost for each (team, current opponent, next opponent) pattern
+        opp_s = self.opponent_strength_idx[opponent]
+        return int(self.cost_flat[self.key_stride + opp_s[:, :-1] * 3 + opp_s[:, 1:]].sum())
     
     def is_valid_schedule(self, schedule):
         """Check if a schedule is valid and print diagnostics."""
@@ -143,28 +394,30 @@ class SportsScheduler:
         # for r, round_matches in enumerate(schedule):
         #     print(f"Round {r+1}: {round_matches}")
         
+        num_teams = self.num_teams
+        
         # Each team should play exactly once in each round
-        for r in range(len(schedule)):
+        for r, round_matches in enumerate(schedule):
             teams_in_round = []
-            for match in schedule[r]:
+            for match in round_matches:
                 teams_in_round.extend(match)
             
             # Count occurrences of each team in the round
             team_count = {}
             for team in teams_in_round:
-                if team < self.num_teams:  # Skip dummy team if any
+                if team < num_teams:  # Skip dummy team if any
                     team_count[team] = team_count.get(team, 0) + 1
             
             # Each team should appear exactly once
-            for team in range(self.num_teams):
+            for team in range(num_teams):
                 if team_count.get(team, 0) != 1:
                     print(f"Validation failed: Team {team} appears {team_count.get(team, 0)} times in round {r+1}")
                     return False
         
         # Each pair of teams should play exactly once
         played_matches = set()
-        for r in range(len(schedule)):
-            for match in schedule[r]:
+        for round_matches in schedule:
+            for match in round_matches:
                 # Sort the match to ensure consistency
                 sorted_match = tuple(sorted(match))
                 if sorted_match in played_matches:
@@ -173,141 +426,89 @@ class SportsScheduler:
                 played_matches.add(sorted_match)
         
         # Check that all required matches are scheduled
-        total_matches = self.num_teams * (self.num_teams - 1) // 2
-        if len(played_matches) != total_matches:
-            print(f"Validation failed: Expected {total_matches} matches, found {len(played_matches)}")
+        total_matches = num_teams * (num_teams - 1) // 2
+        num_played = len(played_matches)
+        if num_played != total_matches:
+            print(f"Validation failed: Expected {total_matches} matches, found {num_played}")
             return False
         
         # print("Schedule is valid!")
         return True
     
-    def generate_neighbor(self, schedule):
-        """Generate a neighbor solution by swapping matches between rounds."""
-        # Make a deep copy to avoid changing the original
-        new_schedule = copy.deepcopy(schedule)
-        
-        # Try different neighborhood operations
-        operation = random.choice([1, 2])
-        
-        if operation == 1:
-            # Swap two matches between different rounds
-            max_attempts = 20  # Limit attempts to find valid swap
-            
-            for _ in range(max_attempts):
-                # Select two different rounds
-                round1_idx = random.randint(0, len(new_schedule) - 1)
-                round2_idx = random.randint(0, len(new_schedule) - 1)
-                while round1_idx == round2_idx:
-                    round2_idx = random.randint(0, len(new_schedule) - 1)
-                
-                # Select one match from each round
-                match1_idx = random.randint(0, len(new_schedule[round1_idx]) - 1)
-                match2_idx = random.randint(0, len(new_schedule[round2_idx]) - 1)
-                
-                match1 = new_schedule[round1_idx][match1_idx]
-                match2 = new_schedule[round2_idx][match2_idx]
-                
-                # Check if swap would create duplicate teams in a round
-                teams_in_round1 = set()
-                teams_in_round2 = set()
-                
-                for idx, match in enumerate(new_schedule[round1_idx]):
-                    if idx != match1_idx:
-                        teams_in_round1.add(match[0])
-                        teams_in_round1.add(match[1])
-                
-                for idx, match in enumerate(new_schedule[round2_idx]):
-                    if idx != match2_idx:
-                        teams_in_round2.add(match[0])
-                        teams_in_round2.add(match[1])
-                
-                # Check if swap would create conflicts
-                if (match2[0] in teams_in_round1 or match2[1] in teams_in_round1 or
-                    match1[0] in teams_in_round2 or match1[1] in teams_in_round2):
-                    continue  # Try again
-                
-                # Perform the swap
-                new_schedule[round1_idx][match1_idx] = match2
-                new_schedule[round2_idx][match2_idx] = match1
-                break
-        
-        elif operation == 2:
-            # Swap home/away status within the same match
-            round_idx = random.randint(0, len(new_schedule) - 1)
-            match_idx = random.randint(0, len(new_schedule[round_idx]) - 1)
-            
-            match = new_schedule[round_idx][match_idx]
-            new_schedule[round_idx][match_idx] = (match[1], match[0])
-        
-        return new_schedule
+    def generate_neighbor(self, opponent, home):
+        """
+        Generate a neighbor solution by a partial round swap or a home/away flip.
+        Returns the neighbor's opponent and home matrices and its cost minus the original cost.
+        """
+        new_opponent, new_home = opponent.copy(), home.copy()
+        saved_opponent = np.empty((self.num_teams, 2), dtype=opponent.dtype)
+        saved_home = np.empty((self.num_teams, 2), dtype=home.dtype)
+        in_move = np.zeros(self.num_teams, dtype=bool)
+        involved = np.empty(self.num_teams, dtype=np.int64)
+        _, _, delta = _apply_neighbor(
+            new_opponent, new_home, self.opponent_strength_idx[new_opponent], self.strength_idx, self.cost_flat,
+            saved_opponent, saved_home, in_move, involved, _seed_rng(random.randrange(2**31))
+        )
+        return new_opponent, new_home, delta
     
-    def simulated_annealing(self, initial_temp=1000, cooling_rate=0.95, iterations=100):
-        """Apply simulated annealing to find a good schedule."""
-        current_schedule = self.schedule
+    def simulated_annealing(self, initial_temp=1000, cooling_rate=0.95, iterations=100, seed=None, num_restarts=1,
+                            verbose=False, report_every=100):
+        """
+        Apply simulated annealing to find a good schedule. With num_restarts > 1 that many
+        independent runs (seeded seed, seed + 1, ...) are annealed in parallel and the best is kept.
+        The best cost after every report_every iterations is kept in self.cost_history and
+        printed when verbose is set.
+        """
+        if report_every < 1:
+            raise ValueError(f"report_every must be at least 1, got {report_every}")
+        
+        current_opponent, current_home = self.opponent, self.home
         
         # Verify initial schedule is valid
-        print("Checking if initial schedule is valid...")
-        if not self.is_valid_schedule(current_schedule):
+        if verbose:
+            print("Checking if initial schedule is valid...")
+        if not self.is_valid_schedule(self._to_tuple_schedule(current_opponent, current_home)):
             print("Warning: Initial schedule is not valid!")
             # Generate a new valid schedule
-            self.schedule = self.initialize_schedule()
-            current_schedule = self.schedule
-            if not self.is_valid_schedule(current_schedule):
+            self.opponent, self.home = self.initialize_schedule()
+            current_opponent, current_home = self.opponent, self.home
+            if not self.is_valid_schedule(self._to_tuple_schedule(current_opponent, current_home)):
                 print("Still cannot generate a valid schedule. Exiting.")
                 return None, None
         
-        current_cost = self.evaluate_cost(current_schedule)
-        print(f"Initial schedule cost: {current_cost}")
+        current_cost = self.evaluate_cost(current_opponent)
+        if verbose:
+            print(f"Initial schedule cost: {current_cost}")
         
-        best_schedule = copy.deepcopy(current_schedule)
-        best_cost = current_cost
+        # The compiled loop has its own generator; seed it from Python's so random.seed()
+        # still makes runs reproducible
+        if seed is None:
+            seed = random.randrange(2**31)
         
-        temp = initial_temp
+        if num_restarts > 1:
+            best_opponent, best_home, best_cost, self.cost_history = _sa_restarts(
+                current_opponent, current_home, self.strength_idx, self.opponent_strength_idx, self.cost_flat,
+                current_cost, iterations, float(initial_temp), float(cooling_rate), seed, report_every,
+                num_restarts
+            )
+        else:
+            best_opponent, best_home, best_cost, self.cost_history = _sa_loop(
+                current_opponent, current_home, self.strength_idx, self.opponent_strength_idx, self.cost_flat,
+                current_cost, iterations, float(initial_temp), float(cooling_rate), seed, report_every
+            )
         
-        for i in range(iterations):
-            # Generate a neighbor solution
-            neighbor_schedule = self.generate_neighbor(current_schedule)
-            
-            # Check if still valid
-            if not self.is_valid_schedule(neighbor_schedule):
-                print(f"Warning: Generated an invalid neighbor at iteration {i}")
-                continue
-                
-            neighbor_cost = self.evaluate_cost(neighbor_schedule)
-            
-            # Decide whether to accept the neighbor
-            if neighbor_cost < current_cost:
-                # Accept better solution
-                current_schedule = neighbor_schedule
-                current_cost = neighbor_cost
-                
-                # Update best solution if needed
-                if current_cost < best_cost:
-                    best_schedule = copy.deepcopy(current_schedule)
-                    best_cost = current_cost
-                    print(f"Iteration {i}: Found new best solution with cost {best_cost}")
-            else:
-                # Accept worse solution with a probability
-                delta = neighbor_cost - current_cost
-                probability = math.exp(-delta / temp)
-                
-                if random.random() < probability:
-                    current_schedule = neighbor_schedule
-                    current_cost = neighbor_cost
-            
-            # Cool down the temperature
-            temp *= cooling_rate
-            
-            # Print progress periodically
-            if (i+1) % 100 == 0:
-                print(f"Iteration {i+1}: Current cost = {current_cost}, Best cost = {best_cost}, Temperature = {temp:.2f}")
+        if verbose:
+            for k, cost in enumerate(self.cost_history):
+                print(f"Iteration {(k + 1) * report_every}: Best cost = {cost}")
         
         # Final validation
-        print("Final validation of best schedule:")
+        if verbose:
+            print("Final validation of best schedule:")
+        best_schedule = self._to_tuple_schedule(best_opponent, best_home)
         if not self.is_valid_schedule(best_schedule):
             print("Warning: Best schedule is not valid!")
         
-        self.schedule = best_schedule
+        self.opponent, self.home = best_opponent, best_home
         return best_schedule, best_cost
 
 # Function to test basic schedule generation
@@ -318,12 +519,12 @@ def test_schedule_generation(num_teams=18):
     scheduler = SportsScheduler(num_teams=num_teams)
     
     # Validate the initial schedule
-    valid = scheduler.is_valid_schedule(scheduler.schedule)
+    valid = scheduler.is_valid_schedule(scheduler._to_tuple_schedule())
     
     if valid:
         print(f"Successfully generated a valid schedule for {num_teams} teams!")
         # Print the initial schedule cost
-        cost = scheduler.evaluate_cost(scheduler.schedule)
+        cost = scheduler.evaluate_cost(scheduler.opponent)
         print(f"Initial schedule cost: {cost}")
     else:
         print(f"Failed to generate a valid schedule for {num_teams} teams.")
@@ -344,10 +545,18 @@ if __name__ == "__main__":
     print("\n=== Testing with 6 teams ===")
     scheduler6 = test_schedule_generation(6)
     
+    # Team ids past 127 no longer fit in int8, so the matrices switch to a wider type
+    print("\n=== Testing with 130 teams ===")
+    scheduler130 = SportsScheduler(num_teams=130, teams_strength=['S']*40 + ['M']*40 + ['W']*50)
+    if scheduler130.is_valid_schedule(scheduler130._to_tuple_schedule()):
+        print(f"Successfully generated a valid schedule for 130 teams ({scheduler130.opponent.dtype} team ids)!")
+    else:
+        print("Failed to generate a valid schedule for 130 teams.")
+    
     # Run a small optimization to verify the entire process
     print("\n=== Running simplified optimization with 8 teams ===")
     scheduler8 = SportsScheduler(num_teams=8, teams_strength=['S']*3 + ['M']*2 + ['W']*3)
-    schedule, cost = scheduler8.simulated_annealing(initial_temp=500, cooling_rate=0.9, iterations=200)
+    schedule, cost = scheduler8.simulated_annealing(initial_temp=500, cooling_rate=0.9, iterations=200, verbose=True)
     
     if schedule:
         print(f"Optimization successful! Final cost: {cost}")